@@ -1,47 +1,251 @@
-import ast
-import itertools
-from typing import List, Dict
+import pickle
+import re
+from pathlib import Path
+from typing import Dict, List
 
 import networkx as nx
-from datasets import load_dataset
 from tqdm import tqdm
 
+# Matches one double-quoted token, tolerating escaped characters inside.
+_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
 
 def r_vector_to_list(s: str) -> List[str]:
     """
     Convert strings like 'c("a", "b")' to ['a', 'b'].
     The dataset uses this R-like vector format.
+
+    A single findall over the string is much cheaper than parsing the
+    vector with ast.literal_eval, and this runs once per recipe.
     """
     if s is None:
         return []
     s = s.strip()
     if not s:
         return []
-    if not s.startswith("c("):
-        # sometimes it's just a single string
-        return [s]
-    # Drop leading 'c(' and trailing ')'
-    inner = s[2:-1]
-    py_like = "[" + inner + "]"
-    try:
-        return ast.literal_eval(py_like)
-    except Exception:
-        # Fallback: return raw
-        return [s]
+    parts = _QUOTED.findall(s)
+    if parts:
+        return parts
+    # sometimes it's just a single unquoted string
+    return [s]
+
+
+# Memo/intern pool: the same few thousand ingredient strings come back
+# millions of times across recipes, so normalize each distinct one once
+# and reuse the same result object everywhere.
+_NORM_CACHE: Dict[str, str] = {}
 
 
 def normalize_ing(name: str) -> str:
-    """Simple normalization for ingredient names."""
-    return name.strip().lower()
+    """Simple normalization for ingredient names (memoized)."""
+    v = _NORM_CACHE.get(name)
+    if v is None:
+        v = name.strip().lower()
+        _NORM_CACHE[name] = v
+        _NORM_CACHE[v] = v  # normalizing is idempotent
+    return v
+
+
+def _safe_float(value) -> float:
+    """Best-effort float conversion; unparseable values count as 0.0."""
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
 
 
-def get_ingredients(row) -> List[str]:
-    parts = r_vector_to_list(row.get("RecipeIngredientParts"))
+def get_ingredients(parts_raw: str) -> List[str]:
+    """Parse and normalize a raw RecipeIngredientParts value."""
+    parts = r_vector_to_list(parts_raw)
     return [normalize_ing(p) for p in parts if p and isinstance(p, str)]
 
 
+# Columns any part of the pipeline reads; loading them together lets
+# build_graph and load_recipes_for_subgraph share one dataset scan.
+_DATASET_COLUMNS = (
+    "Name",
+    "RecipeIngredientParts",
+    "Images",
+    "AggregatedRating",
+    "Calories",
+)
+
+# In-process cache of decoded columns: {"max_recipes": n, "cols": {...}}.
+_DS_CACHE: Dict[str, object] = {}
+
+
+def load_recipe_columns(max_recipes: int) -> Dict[str, list]:
+    """
+    Load the first max_recipes rows of the HF dataset as plain column
+    lists, cached in-process so the graph build and the recipe loader
+    don't each pay for a full dataset scan.
+    """
+    cached_n = _DS_CACHE.get("max_recipes")
+    if cached_n is not None and cached_n >= max_recipes:
+        cols = _DS_CACHE["cols"]
+        if cached_n == max_recipes:
+            return cols
+        return {name: col[:max_recipes] for name, col in cols.items()}
+
+    # Imported lazily: datasets drags in pyarrow/huggingface_hub, which
+    # costs most of a second at interpreter startup.
+    from datasets import load_dataset
+
+    print("Loading dataset 'AkashPS11/recipes_data_food.com'...")
+    ds = load_dataset("AkashPS11/recipes_data_food.com", split="train")
+    # Only the columns we read get decoded from Arrow.
+    ds = ds.select_columns(list(_DATASET_COLUMNS))
+    # Slice up front so iteration never touches the tail of the split.
+    ds = ds.select(range(min(max_recipes, len(ds))))
+
+    cols: Dict[str, list] = {name: [] for name in _DATASET_COLUMNS}
+    # Batched iteration hands back column lists instead of building a
+    # fresh dict per row.
+    for batch in ds.iter(batch_size=1024):
+        for name in _DATASET_COLUMNS:
+            cols[name].extend(batch[name])
+
+    _DS_CACHE["max_recipes"] = max_recipes
+    _DS_CACHE["cols"] = cols
+    return cols
+
+
+def _accumulate_recipes(
+    parts_col: List[str],
+    ratings_col: List,
+    cals_col: List,
+    progress: bool = False,
+):
+    """
+    Accumulate node and edge stats over one chunk of recipe columns.
+
+    Returns (id_to_name, node_count, node_rating, node_cal, edge_stats)
+    with edge keys packed as (a << 32) | b over chunk-local ids.
+    Module-level so ProcessPoolExecutor workers can pickle it.
+    """
+    # Intern ingredient names to small int ids as recipes stream in.
+    ing_ids: Dict[str, int] = {}
+    id_to_name: List[str] = []
+
+    # Per-node accumulators, indexed by ingredient id.
+    node_count: List[int] = []
+    node_rating: List[float] = []
+    node_cal: List[float] = []
+
+    # Edge accumulator: the pair (a, b) with a < b is packed into one
+    # int key (a << 32 | b) -> [cooc, rating_sum, cal_sum], mutated in
+    # place. A packed int hashes to itself; no per-pair tuple is built.
+    edge_stats: Dict[int, List[float]] = {}
+
+    def add_recipe(ings: List[str], r: float, c: float) -> None:
+        ids = []
+        for ing in ings:
+            iid = ing_ids.get(ing)
+            if iid is None:
+                iid = len(id_to_name)
+                ing_ids[ing] = iid
+                id_to_name.append(ing)
+                node_count.append(0)
+                node_rating.append(0.0)
+                node_cal.append(0.0)
+            ids.append(iid)
+
+        # Sort, then dedup with a linear scan: recipes have ~10
+        # ingredients, so this beats allocating a hashset per recipe,
+        # and we need the ids sorted anyway.
+        ids.sort()
+        write = 0
+        prev = -1
+        for iid in ids:
+            if iid != prev:
+                ids[write] = iid
+                write += 1
+                prev = iid
+        del ids[write:]
+        if len(ids) < 2:
+            return
+
+        for iid in ids:
+            node_count[iid] += 1
+            node_rating[iid] += r
+            node_cal[iid] += c
+
+        # Explicit double loop over the sorted ids: no per-pair generator
+        # tuple churn, and a < b is guaranteed by the sort.
+        n_ids = len(ids)
+        for a_idx in range(n_ids - 1):
+            a_shifted = ids[a_idx] << 32
+            for b_idx in range(a_idx + 1, n_ids):
+                key = a_shifted | ids[b_idx]
+                row_stats = edge_stats.get(key)
+                if row_stats is None:
+                    edge_stats[key] = [1, r, c]
+                else:
+                    row_stats[0] += 1
+                    row_stats[1] += r
+                    row_stats[2] += c
+
+    indices = range(len(parts_col))
+    for j in tqdm(indices) if progress else indices:
+        ings = get_ingredients(parts_col[j])
+        if len(ings) < 2:
+            continue
+
+        # Convert rating/calories once per recipe, not per pair.
+        add_recipe(ings, _safe_float(ratings_col[j]), _safe_float(cals_col[j]))
+
+    return id_to_name, node_count, node_rating, node_cal, edge_stats
+
+
+def _merge_accumulators(results):
+    """
+    Merge per-worker accumulators into one, remapping each worker's
+    local ingredient ids onto a shared id space. Counts and sums are
+    commutative, so merge order doesn't matter.
+    """
+    ing_ids: Dict[str, int] = {}
+    id_to_name: List[str] = []
+    node_count: List[int] = []
+    node_rating: List[float] = []
+    node_cal: List[float] = []
+    edge_stats: Dict[int, List[float]] = {}
+
+    for names, counts, ratings, cals, edges in results:
+        remap = []
+        for local_id, name in enumerate(names):
+            gid = ing_ids.get(name)
+            if gid is None:
+                gid = len(id_to_name)
+                ing_ids[name] = gid
+                id_to_name.append(name)
+                node_count.append(0)
+                node_rating.append(0.0)
+                node_cal.append(0.0)
+            remap.append(gid)
+            node_count[gid] += counts[local_id]
+            node_rating[gid] += ratings[local_id]
+            node_cal[gid] += cals[local_id]
+
+        for key, stats in edges.items():
+            a = remap[key >> 32]
+            b = remap[key & 0xFFFFFFFF]
+            if a > b:
+                a, b = b, a
+            gkey = (a << 32) | b
+            row_stats = edge_stats.get(gkey)
+            if row_stats is None:
+                edge_stats[gkey] = list(stats)
+            else:
+                row_stats[0] += stats[0]
+                row_stats[1] += stats[1]
+                row_stats[2] += stats[2]
+
+    return id_to_name, node_count, node_rating, node_cal, edge_stats
+
+
 def build_graph(
     max_recipes: int = 50000,
+    workers: int = 1,
 ) -> nx.Graph:
     """
     Build an ingredient co-occurrence graph from the HF dataset.
@@ -55,79 +259,108 @@ def build_graph(
       - cooc: how many recipes include both
       - rating_sum: sum of ratings of recipes including both
       - cal_sum: sum of calories of recipes including both
-    """
-    print("Loading dataset 'AkashPS11/recipes_data_food.com'...")
-    ds = load_dataset("AkashPS11/recipes_data_food.com", split="train")
 
-    G = nx.Graph()
+    Recipes are first accumulated into plain dicts keyed by small int
+    ingredient ids; the nx.Graph is materialized once at the end via
+    add_nodes_from / add_edges_from. Mutating the graph per recipe is
+    far slower because every pair costs several nested dict lookups.
 
-    def add_recipe_to_graph(ingredients, rating=None, calories=None):
-        unique_ings = list(set(ingredients))
-        if len(unique_ings) < 2:
-            return
+    With workers > 1, recipe chunks are accumulated in parallel worker
+    processes and the (commutative) per-chunk stats merged at the end.
+    """
+    cols = load_recipe_columns(max_recipes)
+    parts_col = cols["RecipeIngredientParts"]
+    ratings_col = cols["AggregatedRating"]
+    cals_col = cols["Calories"]
 
-        # Update nodes
-        for ing in unique_ings:
-            if not G.has_node(ing):
-                G.add_node(ing, count=0, rating_sum=0.0, cal_sum=0.0)
-            G.nodes[ing]["count"] += 1
-            if rating is not None:
-                try:
-                    G.nodes[ing]["rating_sum"] += float(rating)
-                except (TypeError, ValueError):
-                    pass
-            if calories is not None:
-                try:
-                    G.nodes[ing]["cal_sum"] += float(calories)
-                except (TypeError, ValueError):
-                    pass
-
-        # Update edges
-        for a, b in itertools.combinations(unique_ings, 2):
-            if G.has_edge(a, b):
-                G[a][b]["cooc"] += 1
-            else:
-                G.add_edge(a, b, cooc=1, rating_sum=0.0, cal_sum=0.0)
-            if rating is not None:
-                try:
-                    G[a][b]["rating_sum"] += float(rating)
-                except (TypeError, ValueError):
-                    pass
-            if calories is not None:
-                try:
-                    G[a][b]["cal_sum"] += float(calories)
-                except (TypeError, ValueError):
-                    pass
-
-    # If dataset length is known, use it for tqdm; otherwise just use max_recipes
-    total = min(max_recipes, len(ds)) if hasattr(ds, "__len__") else max_recipes
     print(f"Building ingredient graph from first {max_recipes} recipes...")
-    for i, row in tqdm(enumerate(ds), total=total):
-        if i >= max_recipes:
-            break
-        ings = get_ingredients(row)
-        if len(ings) < 2:
-            continue
-        rating = row.get("AggregatedRating")
-        calories = row.get("Calories")
-        add_recipe_to_graph(ings, rating=rating, calories=calories)
+    if workers <= 1:
+        id_to_name, node_count, node_rating, node_cal, edge_stats = (
+            _accumulate_recipes(parts_col, ratings_col, cals_col, progress=True)
+        )
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        n = len(parts_col)
+        chunk = -(-n // workers)  # ceil division
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _accumulate_recipes,
+                    parts_col[s:s + chunk],
+                    ratings_col[s:s + chunk],
+                    cals_col[s:s + chunk],
+                )
+                for s in range(0, n, chunk)
+            ]
+            results = [f.result() for f in futures]
+        id_to_name, node_count, node_rating, node_cal, edge_stats = (
+            _merge_accumulators(results)
+        )
 
     print("Computing average statistics per ingredient...")
-    for ing, data in G.nodes(data=True):
-        c = data.get("count", 0)
-        if c > 0:
-            rating_sum = data.get("rating_sum", 0.0)
-            cal_sum = data.get("cal_sum", 0.0)
-            data["avg_rating"] = rating_sum / c if rating_sum else 0.0
-            data["avg_calories"] = cal_sum / c if cal_sum else 0.0
-        else:
-            data["avg_rating"] = 0.0
-            data["avg_calories"] = 0.0
+
+    def node_attrs(i: int) -> dict:
+        avg_rating = node_rating[i] / node_count[i] if node_rating[i] else 0.0
+        avg_calories = node_cal[i] / node_count[i] if node_cal[i] else 0.0
+        return {
+            "count": node_count[i],
+            "rating_sum": node_rating[i],
+            "cal_sum": node_cal[i],
+            "avg_rating": avg_rating,
+            "avg_calories": avg_calories,
+            # Goal weights for suggest_neighbors_scored, computed once
+            # here since the averages never change after the build.
+            "w_rating": 1.0 + avg_rating / 5.0,
+            "w_healthy": 1.0 + 1.0 / (1.0 + avg_calories / 200.0),
+        }
+
+    G = nx.Graph()
+    G.add_nodes_from(
+        (id_to_name[i], node_attrs(i))
+        for i in range(len(id_to_name))
+        if node_count[i] > 0
+    )
+    G.add_edges_from(
+        (
+            id_to_name[key >> 32],
+            id_to_name[key & 0xFFFFFFFF],
+            {"cooc": stats[0], "rating_sum": stats[1], "cal_sum": stats[2]},
+        )
+        for key, stats in edge_stats.items()
+    )
 
     print(f"Graph built: {G.number_of_nodes()} ingredients, {G.number_of_edges()} edges.")
     return G
 
 
+def build_graph_cached(
+    max_recipes: int = 50000,
+    cache_dir: str = "~/.flavorgraph_cache",
+) -> nx.Graph:
+    """
+    Like build_graph, but memoized on disk.
+
+    The graph is deterministic given max_recipes, so repeated runs
+    (e.g. visualizing several ingredients) reload a pickle in seconds
+    instead of re-parsing the dataset for minutes.
+    """
+    cache_path = Path(cache_dir).expanduser() / f"g_{max_recipes}.pkl"
+
+    if cache_path.exists():
+        print(f"Loading cached graph from: {cache_path}")
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+
+    G = build_graph(max_recipes=max_recipes)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        pickle.dump(G, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"Cached graph at: {cache_path}")
+    return G
+
+
 def suggest_neighbors_scored(
     G: nx.Graph,
     base_ings: List[str],
@@ -146,29 +379,31 @@ def suggest_neighbors_scored(
     base_ings_norm = [normalize_ing(b) for b in base_ings]
     scores: Dict[str, float] = {}
 
+    # Hoist the goal dispatch above the neighbor loop so the hot path
+    # does a single call instead of re-testing the goal per neighbor.
+    # The goal weights themselves are precomputed by build_graph.
+    if goal == "high_rating":
+        # boost by rating (0-5)
+        def score_fn(cooc, node):
+            return cooc * node["w_rating"]
+    elif goal == "healthy":
+        # favor lower-calorie ingredients
+        def score_fn(cooc, node):
+            return cooc * node["w_healthy"]
+    else:
+        def score_fn(cooc, node):
+            return cooc
+
+    nodes = G.nodes
+    adjacency = G.adj
     for ing in base_ings_norm:
         if ing not in G:
             continue
-        for neigh, data in G[ing].items():
+        for neigh, data in adjacency[ing].items():
             cooc = data.get("cooc", 0)
             if cooc < min_cooc:
                 continue
-            base_score = cooc
-
-            node = G.nodes[neigh]
-            rating = node.get("avg_rating", 0.0)
-            cal = node.get("avg_calories", 0.0)
-
-            if goal == "high_rating":
-                # boost by rating (0-5)
-                score = base_score * (1.0 + rating / 5.0)
-            elif goal == "healthy":
-                # favor lower-calorie ingredients
-                score = base_score * (1.0 + 1.0 / (1.0 + cal / 200.0))
-            else:
-                score = base_score
-
-            scores[neigh] = scores.get(neigh, 0.0) + score
+            scores[neigh] = scores.get(neigh, 0.0) + score_fn(cooc, nodes[neigh])
 
     # Remove base ingredients from results
     for b in base_ings_norm:
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import re
 from typing import List, Dict, Tuple, Any
 
-from datasets import load_dataset
-from flavorgraph_ai import normalize_ing
+from flavorgraph_ai import load_recipe_columns, normalize_ing
+
+# Matches one double-quoted token, tolerating escaped characters inside.
+_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
 
 
 def _parse_list_string(raw: str | None) -> list[str]:
@@ -15,6 +18,9 @@ def _parse_list_string(raw: str | None) -> list[str]:
       character(0)                      -> []
       "https://..."                     -> ["https://..."]
       c("url1", "url2")                 -> ["url1", "url2"]
+
+    Quoted tokens are extracted with one compiled-regex pass; this is
+    called once per recipe, so avoiding per-part string surgery matters.
     """
     if not raw:
         return []
@@ -25,25 +31,14 @@ def _parse_list_string(raw: str | None) -> list[str]:
     if s == "character(0)" or s == '"character(0)"':
         return []
 
-    # Strip leading/trailing c( )
-    if s.startswith("c(") and s.endswith(")"):
-        s = s[2:-1].strip()
-
-    if not s:
-        return []
+    parts = _QUOTED.findall(s)
+    if parts:
+        return [p for p in parts if p]
 
-    parts: list[str] = []
-    for part in s.split(","):
-        part = part.strip()
-        # Remove surrounding quotes
-        if part.startswith('"') or part.startswith("'"):
-            part = part[1:]
-        if part.endswith('"') or part.endswith("'"):
-            part = part[:-1]
-        part = part.strip()
-        if part:
-            parts.append(part)
-    return parts
+    # Unquoted input: fall back to a plain comma split.
+    if s.startswith("c(") and s.endswith(")"):
+        s = s[2:-1]
+    return [p.strip() for p in s.split(",") if p.strip()]
 
 
 
@@ -92,41 +87,56 @@ def load_recipes_for_subgraph(
       - ing_to_recipes: mapping ingredient -> list of *local* recipe indices
 
     Only ingredients that are in subgraph_nodes are tracked.
-    """
-    ds = load_dataset("AkashPS11/recipes_data_food.com", split="train")
 
-    node_set = set(subgraph_nodes)
+    The dataset columns come from the cache shared with build_graph, so
+    calling this right after building the graph costs no second scan.
+    """
+    cols = load_recipe_columns(max_recipes)
+    names_col = cols["Name"]
+    parts_col = cols["RecipeIngredientParts"]
+    images_col = cols["Images"]
+    ratings_col = cols["AggregatedRating"]
+    cals_col = cols["Calories"]
+
+    node_set = frozenset(subgraph_nodes)
     recipes: list[dict[str, Any]] = []
     ing_to_recipes: dict[str, list[int]] = {n: [] for n in node_set}
 
-    for idx, rec in enumerate(ds):
-        if idx >= max_recipes:
-            break
+    for j in range(len(parts_col)):
+        parts_raw = parts_col[j] or ""
+
+        # Cheap prefilter: the center ingredient must at least appear
+        # as a substring of the raw field, which rejects most recipes
+        # with one C-level scan before the expensive parse.
+        if center_ing not in parts_raw.lower():
+            continue
 
-        parts_raw = rec.get("RecipeIngredientParts") or ""
         parts = _parse_list_string(parts_raw)
         norm_ings = [normalize_ing(p) for p in parts]
 
-        # Only keep recipes that include the center ingredient
-        if center_ing not in norm_ings:
+        # One C-level intersection instead of a membership test per
+        # ingredient; it doubles as the real center check after the
+        # parse (substring hits can be partial matches, e.g.
+        # "butter" in "buttermilk").
+        matched = set(norm_ings) & node_set
+        if center_ing not in matched:
             continue
 
         recipe_index = len(recipes)
 
         recipes.append(
             {
-                "idx": idx,
-                "name": rec.get("Name") or "",
+                "idx": j,
+                "name": names_col[j] or "",
                 "ingredients": parts,
-                "image": _first_image_url(rec.get("Images")),
-                "rating": float(rec.get("AggregatedRating") or 0.0),
-                "calories": float(rec.get("Calories") or 0.0),
+                "image": _first_image_url(images_col[j]),
+                "rating": float(ratings_col[j] or 0.0),
+                "calories": float(cals_col[j] or 0.0),
             }
         )
 
         # Link every ingredient in this recipe that appears in our subgraph
-        for ing in norm_ings:
-            if ing in node_set:
-                ing_to_recipes[ing].append(recipe_index)
+        for ing in matched:
+            ing_to_recipes[ing].append(recipe_index)
 
     return recipes, ing_to_recipes
